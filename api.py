@@ -10,6 +10,8 @@ from dotenv import load_dotenv
 try:
     from chatbot import ask_samvidhan
     from scenario_advisor import get_scenario_based_response
+    from retrieval import RETRIEVAL_REPLICAS
+    from retrieval_client import get_client
 except ImportError as e:
     raise ImportError(f"Failed to import required modules: {e}")
 
@@ -132,6 +134,15 @@ async def analyze_scenario(scenario_query: ScenarioQuery):
             error=f"Error analyzing scenario: {str(e)}"
         )
 
+# Retrieval replica statistics
+@app.get("/retrieval-stats")
+async def retrieval_stats():
+    """Per-replica QPS and latency of the retrieval servers, if configured."""
+    if not RETRIEVAL_REPLICAS:
+        return {"mode": "local", "replicas": {}}
+    stats = await asyncio.get_running_loop().run_in_executor(None, get_client(RETRIEVAL_REPLICAS).stats)
+    return {"mode": "remote", "replicas": stats}
+
 # Get API information
 @app.get("/info")
 async def get_api_info():
@@ -144,13 +155,14 @@ async def get_api_info():
             "/health": "Health check",
             "/chat": "Ask constitutional questions",
             "/analyze-scenario": "Analyze legal scenarios",
+            "/retrieval-stats": "Retrieval replica QPS and latency",
             "/info": "API information",
             "/docs": "API documentation (Swagger UI)",
             "/redoc": "Alternative API documentation"
         },
         "features": [
             "Constitutional Q&A with FAISS vector search",
-            "Scenario-based legal analysis using Gemini AI",
+            "Scenario-based legal analysis grounded in retrieved sources",
             "Article and Schedule references",
             "Source citations"
         ]
@@ -207,8 +219,8 @@ async def internal_server_error_handler(request, exc):
 if __name__ == "__main__":
     import uvicorn
     
-    # Check if required files exist
-    required_files = ["vector_store/faiss_index_constitution/index.faiss"]
+    # Check if required files exist (retrieval servers load the index themselves)
+    required_files = [] if RETRIEVAL_REPLICAS else ["vector_store/faiss_index_constitution/index.faiss"]
     missing_files = [f for f in required_files if not os.path.exists(f)]
     
     if missing_files:
@@ -1,10 +1,9 @@
 import os
 import asyncio
 from dotenv import load_dotenv
-from langchain_google_genai import GoogleGenerativeAI, GoogleGenerativeAIEmbeddings
-from langchain_community.vectorstores import FAISS
-from langchain.chains import RetrievalQA
+from langchain_google_genai import GoogleGenerativeAI
 from langchain.prompts import PromptTemplate
+from retrieval import RETRIEVAL_REPLICAS, load_vector_store, search_many
 
 # Ensure an event loop exists for async gRPC clients
 try:
@@ -18,15 +17,9 @@ api_key = os.getenv("GOOGLE_API_KEY")
 if not api_key:
     raise ValueError("Google API Key not found. Please set it in your .env file.")
 
-# Path to FAISS index - Updated to match build_faiss.py
-faiss_path = "vector_store/faiss_index_constitution"
-if not os.path.exists(f"{faiss_path}/index.faiss"):
-    raise FileNotFoundError(f"FAISS index not found at {faiss_path}. Please build the index first.")
-
-# Load vector store
-embeddings = GoogleGenerativeAIEmbeddings(model="models/embedding-001")
-db = FAISS.load_local(faiss_path, embeddings, allow_dangerous_deserialization=True)
-retriever = db.as_retriever(search_type="similarity", search_kwargs={"k": 5})
+# Load the local vector store up front unless retrieval servers are configured
+if not RETRIEVAL_REPLICAS:
+    load_vector_store()
 
 # LLM model
 llm = GoogleGenerativeAI(model="gemini-1.5-flash", api_key=api_key)
@@ -53,20 +46,15 @@ Now provide the answer:
 
 PROMPT = PromptTemplate(template=prompt_template, input_variables=["context", "question"])
 
-# Retrieval-based QA chain
-qa_chain = RetrievalQA.from_chain_type(
-    llm=llm,
-    retriever=retriever,
-    return_source_documents=True,
-    chain_type_kwargs={"prompt": PROMPT},
-    chain_type="stuff"
-)
-
 def ask_samvidhan(question: str) -> str:
     """Answer queries about the Constitution of India with sources."""
-    result = qa_chain({"query": question})
-    answer = result.get("result", "Sorry, I couldn't find an answer.")
-    sources = result.get("source_documents", [])
+    sources = [doc for doc, _ in search_many([question], k=5)[0]]
+    context = "\n\n".join(doc.page_content for doc in sources)
+
+    response = llm.invoke(PROMPT.format(context=context, question=question))
+    answer = response if isinstance(response, str) else getattr(response, "content", str(response))
+    if not answer:
+        answer = "Sorry, I couldn't find an answer."
 
     if sources:
         answer += "\n\n**Sources:**"
@@ -0,0 +1,101 @@
+import os
+import numpy as np
+from dotenv import load_dotenv
+from langchain_google_genai import GoogleGenerativeAIEmbeddings
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+from retrieval_client import get_client, parse_replicas
+
+# Load API key
+load_dotenv()
+
+# Path to FAISS index - Updated to match build_faiss.py
+faiss_path = "vector_store/faiss_index_constitution"
+
+# Retrieval servers from the comma-separated host:port list; empty means search in-process
+RETRIEVAL_REPLICAS = parse_replicas(os.getenv("RETRIEVAL_REPLICAS"))
+
+_store = None
+
+def load_vector_store():
+    """
+    Load the FAISS index and its embedding model once per process.
+
+    Returns:
+        tuple: (embeddings, db) shared by every caller in this process.
+    """
+    global _store
+    if _store is None:
+        if not os.path.exists(f"{faiss_path}/index.faiss"):
+            raise FileNotFoundError(f"FAISS index not found at {faiss_path}. Please build the index first.")
+
+        embeddings = GoogleGenerativeAIEmbeddings(model="models/embedding-001")
+        db = FAISS.load_local(faiss_path, embeddings, allow_dangerous_deserialization=True)
+        _store = (embeddings, db)
+    return _store
+
+def search_local(queries, k=5):
+    """
+    Retrieve the top-k chunks for several queries from the in-process index.
+
+    All queries are embedded in a single batched request and looked up with
+    one multi-query FAISS search over the (n, d) query matrix.
+
+    Args:
+        queries (list[str]): Search queries.
+        k (int): Number of chunks to return per query.
+
+    Returns:
+        list: One list of (Document, score) pairs per query, best match first.
+    """
+    if not queries:
+        return []
+
+    embeddings, db = load_vector_store()
+    vectors = np.asarray(
+        embeddings.embed_documents(list(queries), task_type="retrieval_query"),
+        dtype=np.float32
+    )
+    # build_faiss.py and create_embedding.py use the wrapper defaults (no L2
+    # normalisation), so query vectors are searched as-is
+    scores, indices = db.index.search(vectors, k)
+
+    results = []
+    for row_scores, row_indices in zip(scores, indices):
+        hits = []
+        for score, i in zip(row_scores, row_indices):
+            if i == -1:
+                continue
+            doc = db.docstore.search(db.index_to_docstore_id[i])
+            # The docstore returns an error string for missing ids
+            if isinstance(doc, Document):
+                hits.append((doc, float(score)))
+        results.append(hits)
+    return results
+
+def search_many(queries, k=5):
+    """
+    Retrieve the top-k chunks for several queries at once.
+
+    Uses the retrieval servers in RETRIEVAL_REPLICAS when set, otherwise the
+    local index. Both return the same shape.
+
+    Args:
+        queries (list[str]): Search queries.
+        k (int): Number of chunks to return per query.
+
+    Returns:
+        list: One list of (Document, score) pairs per query, best match first.
+    """
+    if not RETRIEVAL_REPLICAS:
+        return search_local(queries, k)
+    if not queries:
+        return []
+
+    return [
+        [
+            (Document(page_content=hit["content"], metadata=hit["metadata"]), hit["score"])
+            for hit in hits
+        ]
+        for hits in get_client(RETRIEVAL_REPLICAS).search(queries, k)
+    ]
@@ -0,0 +1,309 @@
+import os
+import time
+import random
+import socket
+import struct
+import threading
+import argparse
+from collections import deque
+import msgpack
+
+# Wire protocol: every message is a 4-byte big-endian length followed by a msgpack body
+HEADER = struct.Struct("!I")
+MAX_FRAME_BYTES = 64 * 1024 * 1024
+
+# Client tuning
+CONNECT_TIMEOUT = 2.0
+REQUEST_TIMEOUT = 30.0
+MAX_IDLE_PER_REPLICA = 8
+FAILURE_COOLDOWN = 10.0
+STATS_WINDOW = 60.0
+EWMA_MAX_AGE = 5.0  # A latency estimate older than this no longer steers traffic
+DEFAULT_LATENCY_MS = 1.0  # Estimate used when no replica has a fresh sample
+
+def pack_frame(message):
+    body = msgpack.packb(message, use_bin_type=True, default=str)
+    return HEADER.pack(len(body)) + body
+
+def unpack_body(body):
+    return msgpack.unpackb(body, raw=False)
+
+def _recv_exactly(sock, size):
+    data = bytearray()
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise ConnectionError("Retrieval server closed the connection")
+        data.extend(chunk)
+    return bytes(data)
+
+class LatencyWindow:
+    """
+    Sliding window of request latencies used to report QPS and percentiles.
+
+    QPS is averaged over the full window, so client and server reports of the
+    same traffic agree even right after startup.
+    """
+
+    def __init__(self, seconds=STATS_WINDOW):
+        self.seconds = seconds
+        self.samples = deque()
+        self.lock = threading.Lock()
+
+    def record(self, latency_ms):
+        now = time.monotonic()
+        with self.lock:
+            self.samples.append((now, latency_ms))
+            self._trim(now)
+
+    def _trim(self, now):
+        while self.samples and now - self.samples[0][0] > self.seconds:
+            self.samples.popleft()
+
+    def snapshot(self):
+        now = time.monotonic()
+        with self.lock:
+            self._trim(now)
+            latencies = sorted(latency for _, latency in self.samples)
+
+        def percentile(p):
+            if not latencies:
+                return 0.0
+            return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))], 2)
+
+        return {
+            "qps": round(len(latencies) / self.seconds, 2),
+            "p50_ms": percentile(0.50),
+            "p95_ms": percentile(0.95),
+            "window_s": self.seconds,
+        }
+
+class Replica:
+    """One retrieval server endpoint with its own connection pool and health state."""
+
+    def __init__(self, address):
+        host, port = address.rsplit(":", 1)
+        self.address = address
+        self.host = host
+        self.port = int(port)
+        self.idle = []
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.ewma_ms = 0.0
+        self.sampled_at = 0.0
+        self.down_until = 0.0
+        self.requests = 0
+        self.errors = 0
+        self.server_errors = 0
+        self.latency = LatencyWindow()
+
+    def healthy(self):
+        return time.monotonic() >= self.down_until
+
+    def latency_estimate(self):
+        """EWMA latency, or None if there is no recent sample."""
+        if not self.ewma_ms or time.monotonic() - self.sampled_at > EWMA_MAX_AGE:
+            return None
+        return self.ewma_ms
+
+    def score(self, default_ms):
+        # Prefer fast, lightly loaded replicas. Unsampled or stale replicas are
+        # assumed to be average, so they still get traffic and load still counts.
+        estimate = self.latency_estimate()
+        return (default_ms if estimate is None else estimate) * (1 + self.in_flight)
+
+    def _connect(self):
+        sock = socket.create_connection((self.host, self.port), timeout=CONNECT_TIMEOUT)
+        sock.settimeout(REQUEST_TIMEOUT)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return sock
+
+    def _drain_idle(self):
+        with self.lock:
+            idle, self.idle = self.idle, []
+        for conn in idle:
+            conn.close()
+
+    def acquire(self):
+        """Return (socket, reused) and count the request as in flight."""
+        with self.lock:
+            self.in_flight += 1
+            if self.idle:
+                return self.idle.pop(), True
+        try:
+            return self._connect(), False
+        except OSError:
+            self.fail(None)
+            raise
+
+    def reconnect(self, stale):
+        """
+        Swap a stale pooled socket for a fresh connection, keeping the request
+        in flight. On failure the caller is responsible for calling fail().
+        """
+        stale.close()
+        # The rest of the pool predates the same server restart
+        self._drain_idle()
+        return self._connect()
+
+    def release(self, sock, latency_ms=None):
+        """Return a socket to the pool; only requests with a latency are recorded."""
+        with self.lock:
+            self.in_flight -= 1
+            if latency_ms is not None:
+                self.requests += 1
+                self.ewma_ms = latency_ms if not self.ewma_ms else 0.8 * self.ewma_ms + 0.2 * latency_ms
+                self.sampled_at = time.monotonic()
+            if len(self.idle) < MAX_IDLE_PER_REPLICA:
+                self.idle.append(sock)
+                sock = None
+        if sock is not None:
+            sock.close()
+        if latency_ms is not None:
+            self.latency.record(latency_ms)
+
+    def fail(self, sock):
+        if sock is not None:
+            sock.close()
+        with self.lock:
+            self.in_flight -= 1
+            self.errors += 1
+            self.down_until = time.monotonic() + FAILURE_COOLDOWN
+            # Start afresh after the cooldown instead of reusing a pre-failure estimate
+            self.ewma_ms = 0.0
+        # Pooled sockets to a failed replica are most likely dead as well
+        self._drain_idle()
+
+    def stats(self):
+        with self.lock:
+            stats = {
+                "healthy": self.healthy(),
+                "in_flight": self.in_flight,
+                "requests": self.requests,
+                "errors": self.errors,
+                "server_errors": self.server_errors,
+                "ewma_ms": round(self.ewma_ms, 2),
+            }
+        stats.update(self.latency.snapshot())
+        return stats
+
+class RetrievalClient:
+    """
+    Pooled client for one or more retrieval servers.
+
+    Each call goes to the healthy replica with the best latency/load score;
+    ties (e.g. at startup) are broken at random.
+    A pooled connection that went stale (e.g. after a server restart) is
+    retried once on a fresh connection to the same replica. If that fails too,
+    the replica is put on cooldown and the request moves to the next one, so
+    a single dead replica never fails a query.
+    """
+
+    def __init__(self, addresses):
+        if not addresses:
+            raise ValueError("At least one retrieval replica address is required.")
+        self.replicas = [Replica(address) for address in addresses]
+
+    def _ordered_replicas(self):
+        healthy = [r for r in self.replicas if r.healthy()]
+        if healthy:
+            estimates = [e for e in (r.latency_estimate() for r in healthy) if e is not None]
+            default_ms = sum(estimates) / len(estimates) if estimates else DEFAULT_LATENCY_MS
+            random.shuffle(healthy)
+            return sorted(healthy, key=lambda r: r.score(default_ms))
+        # Everything is cooling down; try the replica that failed longest ago first
+        return sorted(self.replicas, key=lambda r: r.down_until)
+
+    @staticmethod
+    def _exchange(sock, message):
+        sock.sendall(pack_frame(message))
+        (size,) = HEADER.unpack(_recv_exactly(sock, HEADER.size))
+        if size > MAX_FRAME_BYTES:
+            raise ValueError(f"Oversized response frame ({size} bytes)")
+        return unpack_body(_recv_exactly(sock, size))
+
+    def _call_replica(self, replica, message):
+        sock, reused = replica.acquire()
+        start = time.perf_counter()
+        try:
+            try:
+                response = self._exchange(sock, message)
+            except OSError as e:
+                # A timeout means the server is alive but slow; don't resend the work
+                if not reused or isinstance(e, TimeoutError):
+                    raise
+                sock = replica.reconnect(sock)
+                start = time.perf_counter()
+                response = self._exchange(sock, message)
+        except (OSError, ValueError):
+            replica.fail(sock)
+            raise
+        # Only successful searches feed the latency/QPS stats, matching the server
+        latency_ms = None
+        if message.get("op") == "search" and response.get("ok"):
+            latency_ms = (time.perf_counter() - start) * 1000
+        replica.release(sock, latency_ms)
+        return response
+
+    def request(self, message):
+        last_error = None
+        for replica in self._ordered_replicas():
+            try:
+                response = self._call_replica(replica, message)
+            except (OSError, ValueError) as e:
+                last_error = e
+                continue
+            if not response.get("ok"):
+                with replica.lock:
+                    replica.server_errors += 1
+                raise RuntimeError(f"Retrieval server {replica.address} error: {response.get('error')}")
+            return response
+        raise ConnectionError(f"No retrieval replica available: {last_error}")
+
+    def search(self, queries, k=5):
+        """Run a batched search and return one list of hit dicts per query."""
+        return self.request({"op": "search", "queries": list(queries), "k": k})["results"]
+
+    def stats(self):
+        """Per-replica QPS and latency, as seen by this client and by each server."""
+        report = {}
+        for replica in self.replicas:
+            entry = {"client": replica.stats()}
+            try:
+                entry["server"] = self._call_replica(replica, {"op": "stats"}).get("stats")
+            except (OSError, ValueError) as e:
+                entry["server"] = {"error": str(e)}
+            report[replica.address] = entry
+        return report
+
+def parse_replicas(value):
+    return [address.strip() for address in (value or "").split(",") if address.strip()]
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+def get_client(addresses):
+    """Shared client for the given replica addresses, created on first use."""
+    key = tuple(addresses)
+    with _clients_lock:
+        if key not in _clients:
+            _clients[key] = RetrievalClient(list(key))
+        return _clients[key]
+
+if __name__ == "__main__":
+    import json
+
+    parser = argparse.ArgumentParser(description="Query retrieval server replicas.")
+    parser.add_argument("--replicas", default=os.getenv("RETRIEVAL_REPLICAS", "127.0.0.1:7001"),
+                        help="Comma-separated host:port list")
+    parser.add_argument("--query", action="append", help="Query to search (repeatable)")
+    parser.add_argument("-k", type=int, default=5)
+    args = parser.parse_args()
+
+    client = RetrievalClient(parse_replicas(args.replicas))
+    if args.query:
+        for query, hits in zip(args.query, client.search(args.query, k=args.k)):
+            print(f"\n{query}")
+            for hit in hits:
+                print(f"  {hit['score']:.4f}  {hit['metadata'].get('source', 'Unknown')}")
+    print(json.dumps(client.stats(), indent=2))
@@ -0,0 +1,140 @@
+import time
+import asyncio
+import argparse
+import multiprocessing
+from retrieval_client import HEADER, MAX_FRAME_BYTES, LatencyWindow, pack_frame, unpack_body
+
+class RetrievalServer:
+    """
+    Standalone process hosting the FAISS index behind a msgpack socket protocol.
+
+    Supported ops:
+        search: {"queries": [...], "k": int} -> one list of hits per query
+        stats:  per-replica QPS and latency over a sliding window
+        ping:   liveness check
+
+    Args:
+        search: Callable (queries, k) -> one list of (Document, score) pairs
+            per query, normally retrieval.search_local.
+    """
+
+    def __init__(self, search, host="127.0.0.1", port=7001):
+        self.search = search
+        self.host = host
+        self.port = port
+        self.latency = LatencyWindow()
+        self.requests = 0
+        self.queries = 0
+        self.errors = 0
+
+    async def handle_search(self, message):
+        queries = message.get("queries") or []
+        k = int(message.get("k", 5))
+        loop = asyncio.get_running_loop()
+        # Embedding and FAISS search block, so keep them off the event loop
+        results = await loop.run_in_executor(None, self.search, queries, k)
+        self.queries += len(queries)
+        return {
+            "ok": True,
+            "results": [
+                [
+                    {"content": doc.page_content, "metadata": doc.metadata, "score": score}
+                    for doc, score in hits
+                ]
+                for hits in results
+            ],
+        }
+
+    def stats(self):
+        stats = {
+            "replica": f"{self.host}:{self.port}",
+            "requests": self.requests,
+            "queries": self.queries,
+            "errors": self.errors,
+        }
+        stats.update(self.latency.snapshot())
+        return stats
+
+    async def dispatch(self, message):
+        op = message.get("op")
+        if op == "search":
+            start = time.perf_counter()
+            response = await self.handle_search(message)
+            # Failed searches raise and are counted as errors instead
+            self.requests += 1
+            self.latency.record((time.perf_counter() - start) * 1000)
+            return response
+        if op == "stats":
+            return {"ok": True, "stats": self.stats()}
+        if op == "ping":
+            return {"ok": True}
+        return {"ok": False, "error": f"Unknown op: {op}"}
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    (size,) = HEADER.unpack(await reader.readexactly(HEADER.size))
+                except asyncio.IncompleteReadError:
+                    break
+                if size > MAX_FRAME_BYTES:
+                    self.errors += 1
+                    break
+                try:
+                    message = unpack_body(await reader.readexactly(size))
+                except ValueError:
+                    # Malformed frame; the stream can't be trusted any more
+                    self.errors += 1
+                    break
+                try:
+                    response = await self.dispatch(message)
+                except Exception as e:
+                    response = {"ok": False, "error": str(e)}
+                if not response.get("ok"):
+                    self.errors += 1
+                writer.write(pack_frame(response))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self):
+        server = await asyncio.start_server(self.handle_connection, self.host, self.port)
+        print(f"Retrieval replica listening on {self.host}:{self.port}")
+        async with server:
+            await server.serve_forever()
+
+def run_replica(host, port):
+    # Imported here so the protocol layer can be used without the index stack
+    from retrieval import load_vector_store, search_local
+
+    # Load the index before accepting connections
+    load_vector_store()
+    asyncio.run(RetrievalServer(search_local, host, port).serve())
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run FAISS retrieval server replicas.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=7001, help="Port of the first replica")
+    parser.add_argument("--replicas", type=int, default=1,
+                        help="Number of local replicas, on consecutive ports")
+    args = parser.parse_args()
+
+    if args.replicas <= 1:
+        run_replica(args.host, args.port)
+    else:
+        processes = [
+            multiprocessing.Process(target=run_replica, args=(args.host, args.port + i))
+            for i in range(args.replicas)
+        ]
+        for process in processes:
+            process.start()
+        addresses = ",".join(f"{args.host}:{args.port + i}" for i in range(args.replicas))
+        print(f"Set RETRIEVAL_REPLICAS={addresses} to use these replicas.")
+        try:
+            for process in processes:
+                process.join()
+        except KeyboardInterrupt:
+            for process in processes:
+                process.terminate()
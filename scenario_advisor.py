@@ -1,6 +1,8 @@
 import os
+import re
 from dotenv import load_dotenv
 from langchain_google_genai import GoogleGenerativeAI
+from retrieval import search_many
 
 # Load API Key
 load_dotenv()
@@ -12,9 +14,115 @@ if not api_key:
 # Initialize Gemini Model
 llm = GoogleGenerativeAI(model="gemini-1.5-flash", api_key=api_key)
 
+# Facet queries searched alongside the scenario itself. They carry only the
+# scenario's key terms so the facet wording still steers the embedding.
+SUB_QUERY_TEMPLATES = [
+    "Fundamental rights guaranteed for {terms}",
+    "Reasonable restrictions and exceptions on {terms}",
+    "Supreme Court and High Court judgments on {terms}",
+]
+
+# General English function words; they carry no retrieval signal
+STOPWORDS = {
+    "a", "about", "above", "after", "again", "against", "all", "am", "an", "and",
+    "any", "are", "as", "at", "be", "because", "been", "before", "being", "below",
+    "between", "both", "but", "by", "can", "could", "did", "do", "does", "doing",
+    "down", "during", "each", "few", "for", "from", "further", "had", "has", "have",
+    "having", "he", "her", "here", "hers", "herself", "him", "himself", "his", "how",
+    "i", "if", "in", "into", "is", "it", "its", "itself", "just", "me", "more",
+    "most", "my", "myself", "no", "nor", "not", "now", "of", "off", "on", "once",
+    "only", "or", "other", "our", "ours", "ourselves", "out", "over", "own", "same",
+    "she", "should", "so", "some", "such", "than", "that", "the", "their", "theirs",
+    "them", "themselves", "then", "there", "these", "they", "this", "those",
+    "through", "to", "too", "under", "until", "up", "very", "was", "we", "were",
+    "what", "when", "where", "which", "while", "who", "whom", "why", "will", "with",
+    "within", "without", "would", "you", "your", "yours", "yourself", "yourselves",
+    "may", "might", "must", "shall",
+}
+MAX_KEY_TERMS = 16
+
+# Legal references such as "Article 19(1)(g)" or "Section 144" are kept whole;
+# everything else is split into words and numbers
+TERM_PATTERN = re.compile(
+    r"(?:article|section|rule|schedule|clause)s?\s+\d+[a-z]?(?:\s*\(\w+\))*"
+    r"|[a-z0-9][a-z0-9'-]*"
+)
+
+# Retrieval and evidence budget
+CHUNKS_PER_QUERY = 4
+EVIDENCE_TOKEN_BUDGET = 2000
+CHARS_PER_TOKEN = 4  # Rough estimate, good enough for budgeting
+
+def extract_key_terms(text, limit=MAX_KEY_TERMS):
+    """Return the distinct non-stopword terms of a scenario, in order, up to limit."""
+    terms = []
+    for match in TERM_PATTERN.finditer(text.lower()):
+        term = re.sub(r"\s+", " ", match.group()).replace(" (", "(")
+        if term not in STOPWORDS and term not in terms:
+            terms.append(term)
+    return terms[:limit]
+
+def decompose_scenario(scenario_description):
+    """
+    Split a scenario into focused retrieval queries.
+
+    Args:
+        scenario_description (str): The situation or hypothetical case.
+
+    Returns:
+        list: The scenario itself, followed by short sub-queries covering
+        rights, restrictions and precedents.
+    """
+    scenario = " ".join(scenario_description.split())
+    terms = " ".join(extract_key_terms(scenario))
+    if not terms:
+        return [scenario]
+    return [scenario] + [template.format(terms=terms) for template in SUB_QUERY_TEMPLATES]
+
+def gather_evidence(sub_queries, token_budget=EVIDENCE_TOKEN_BUDGET):
+    """
+    Retrieve, merge and deduplicate evidence for all sub-queries.
+
+    Chunks returned by more than one sub-query are kept once, at their best
+    rank. Chunks are then taken rank by rank, round-robin across sub-queries,
+    until the token budget is spent. Ranks are used instead of raw scores so
+    the order does not depend on the index's distance strategy.
+
+    Args:
+        sub_queries (list): Queries from decompose_scenario.
+        token_budget (int): Approximate token limit for the evidence block.
+
+    Returns:
+        list: Documents to ground the analysis on, most relevant first.
+    """
+    best = {}
+    for query_index, hits in enumerate(search_many(sub_queries, k=CHUNKS_PER_QUERY)):
+        for rank, (doc, _) in enumerate(hits):
+            key = doc.page_content.strip()
+            if key not in best or (rank, query_index) < best[key][1]:
+                best[key] = (doc, (rank, query_index))
+
+    evidence = []
+    used_tokens = 0
+    for doc, _ in sorted(best.values(), key=lambda item: item[1]):
+        cost = len(doc.page_content) // CHARS_PER_TOKEN + 1
+        if used_tokens + cost > token_budget:
+            continue
+        evidence.append(doc)
+        used_tokens += cost
+    return evidence
+
+def _source_label(doc):
+    src = doc.metadata.get("source", "Unknown")
+    page = doc.metadata.get("page", "")
+    return f"{src} (Page {page})" if page else src
+
 def get_scenario_based_response(scenario_description):
     """
     Generate a Constitution of India based legal analysis for a given scenario.
+
+    The scenario is decomposed into sub-queries, evidence for all of them is
+    retrieved in one batched search, and a single grounded answer is generated.
     
     Args:
         scenario_description (str): The situation or hypothetical case.
@@ -23,36 +131,55 @@ def get_scenario_based_response(scenario_description):
         str: Legal analysis and guidance based on the Constitution of India.
     """
 
+    try:
+        evidence = gather_evidence(decompose_scenario(scenario_description))
+    except Exception as e:
+        return f"Error retrieving relevant context: {str(e)}"
+
+    context = "\n\n".join(
+        f"[{i}] {_source_label(doc)}\n{doc.page_content.strip()}"
+        for i, doc in enumerate(evidence, start=1)
+    ) or "No relevant context was found."
+
     prompt = f"""
     You are a Constitutional law expert specializing in the Constitution of India.
-    Analyze the following scenario and provide a factual, unbiased explanation:
+    Analyze the following scenario using the numbered context below:
 
     Scenario:
     {scenario_description}
 
+    Context:
+    {context}
+
     Your response should include:
     1. Relevant Articles, Schedules, or Amendments (cite exact numbers and names).
-    2. Explanation of how they apply to the scenario.
-    3. Possible legal interpretations or outcomes.
-    4. Any relevant Supreme Court or High Court precedents (if applicable).
-    5. Limitations or areas of uncertainty in constitutional interpretation.
+    2. How they apply to the scenario, including any reasonable restrictions.
+    3. Relevant Supreme Court or High Court precedents (if present in the context).
+    4. Limitations or areas of uncertainty.
 
-    Use clear, simple language so a non-lawyer can understand.
-    Format the answer with clear headings and bullet points.
+    Cite the context as [1], [2], etc. If the context is insufficient, say so.
+    Be concise and use clear, simple language with headings and bullet points.
     """
 
     try:
         response = llm.invoke(prompt)
         # Handle both string and object responses
         if hasattr(response, 'content'):
-            return response.content
+            answer = response.content
         elif isinstance(response, str):
-            return response
+            answer = response
         else:
-            return str(response)
+            answer = str(response)
     except Exception as e:
         return f"Error generating response: {str(e)}"
 
+    if evidence:
+        answer += "\n\n**Sources:**"
+        for i, doc in enumerate(evidence, start=1):
+            answer += f"\n- [{i}] {_source_label(doc)}"
+
+    return answer
+
 if __name__ == "__main__":
     scenario = """
     A state government passes a law restricting online speech criticizing its ministers,
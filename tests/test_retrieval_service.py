@@ -0,0 +1,215 @@
+import os
+import sys
+import time
+import socket
+import subprocess
+import threading
+import pytest
+
+pytest.importorskip("msgpack")
+import retrieval_client
+from retrieval_client import HEADER, LatencyWindow, Replica, RetrievalClient
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Replica with a stubbed search_local, so no index or API key is needed
+SERVER_CODE = """
+import sys
+import asyncio
+import time
+from types import SimpleNamespace
+from retrieval_server import RetrievalServer
+
+def search(queries, k):
+    if "boom" in queries:
+        raise RuntimeError("embedding failed")
+    if "slow" in queries:
+        time.sleep(0.1)
+    return [
+        [(SimpleNamespace(page_content=query.upper(), metadata={"source": "stub.pdf", "page": i}), float(i))
+         for i in range(k)]
+        for query in queries
+    ]
+
+asyncio.run(RetrievalServer(search, "127.0.0.1", int(sys.argv[1])).serve())
+"""
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def start_replica(port):
+    process = subprocess.Popen([sys.executable, "-c", SERVER_CODE, str(port)], cwd=ROOT,
+                               stdout=subprocess.DEVNULL)
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return process
+        except OSError:
+            time.sleep(0.05)
+    process.kill()
+    raise RuntimeError(f"Replica on port {port} did not start")
+
+def stop_replica(process):
+    process.kill()
+    process.wait()
+
+@pytest.fixture
+def replica():
+    port = free_port()
+    process = start_replica(port)
+    yield port
+    stop_replica(process)
+
+def test_search_round_trip(replica):
+    client = RetrievalClient([f"127.0.0.1:{replica}"])
+
+    results = client.search(["article 19", "article 21"], k=2)
+
+    assert [[hit["content"] for hit in hits] for hits in results] == [
+        ["ARTICLE 19", "ARTICLE 19"],
+        ["ARTICLE 21", "ARTICLE 21"],
+    ]
+    assert results[0][1] == {"content": "ARTICLE 19", "metadata": {"source": "stub.pdf", "page": 1}, "score": 1.0}
+
+def test_failover_skips_dead_replica(replica):
+    dead = f"127.0.0.1:{free_port()}"
+    live = f"127.0.0.1:{replica}"
+    client = RetrievalClient([dead, live])
+
+    assert client.search(["speech"], k=1)[0][0]["content"] == "SPEECH"
+    assert client.search(["speech"], k=1)[0][0]["content"] == "SPEECH"
+
+    stats = client.stats()
+    assert stats[dead]["client"]["healthy"] is False
+    assert stats[dead]["client"]["errors"] == 1
+    assert "error" in stats[dead]["server"]
+    assert stats[live]["client"]["requests"] == 2
+
+def test_unknown_op_raises_runtime_error(replica):
+    client = RetrievalClient([f"127.0.0.1:{replica}"])
+
+    with pytest.raises(RuntimeError, match="Unknown op"):
+        client.request({"op": "bogus"})
+    assert client.replicas[0].healthy()
+
+def test_replica_restart_between_searches():
+    port = free_port()
+    client = RetrievalClient([f"127.0.0.1:{port}"])
+
+    process = start_replica(port)
+    try:
+        assert client.search(["before"], k=1)[0][0]["content"] == "BEFORE"
+    finally:
+        stop_replica(process)
+
+    process = start_replica(port)
+    try:
+        assert client.search(["after"], k=1)[0][0]["content"] == "AFTER"
+    finally:
+        stop_replica(process)
+
+    replica = client.replicas[0]
+    assert replica.healthy()
+    assert replica.errors == 0
+    assert replica.requests == 2
+
+def test_stats_probe_is_not_counted_as_traffic(replica):
+    address = f"127.0.0.1:{replica}"
+    client = RetrievalClient([address])
+    client.search(["speech"], k=1)
+
+    client.stats()
+    stats = client.stats()[address]
+
+    assert stats["client"]["requests"] == stats["server"]["requests"] == 1
+    assert stats["client"]["qps"] == stats["server"]["qps"]
+
+def test_malformed_frame_closes_connection(replica):
+    with socket.create_connection(("127.0.0.1", replica), timeout=2) as sock:
+        sock.sendall(HEADER.pack(1) + b"\xc1")
+        assert sock.recv(1) == b""
+
+    stats = RetrievalClient([f"127.0.0.1:{replica}"]).stats()
+    assert stats[f"127.0.0.1:{replica}"]["server"]["errors"] == 1
+
+def test_latency_window_qps_uses_full_window():
+    window = LatencyWindow(seconds=60)
+    for latency in (1.0, 2.0, 3.0, 4.0, 5.0, 6.0):
+        window.record(latency)
+
+    snapshot = window.snapshot()
+    assert snapshot["qps"] == 0.1
+    assert snapshot["p50_ms"] == 4.0
+
+def test_parse_replicas_ignores_blank_entries():
+    assert retrieval_client.parse_replicas(" , ,") == []
+    assert retrieval_client.parse_replicas("a:1, b:2,") == ["a:1", "b:2"]
+
+def test_failed_search_is_an_error_on_both_sides(replica):
+    address = f"127.0.0.1:{replica}"
+    client = RetrievalClient([address])
+
+    with pytest.raises(RuntimeError, match="embedding failed"):
+        client.search(["boom"], k=1)
+    client.search(["speech"], k=1)
+
+    stats = client.stats()[address]
+    assert stats["client"]["requests"] == stats["server"]["requests"] == 1
+    assert stats["client"]["server_errors"] == stats["server"]["errors"] == 1
+    assert stats["client"]["healthy"] is True
+
+def test_startup_burst_spreads_across_replicas():
+    ports = [free_port(), free_port()]
+    processes = [start_replica(port) for port in ports]
+    try:
+        client = RetrievalClient([f"127.0.0.1:{port}" for port in ports])
+        threads = [threading.Thread(target=client.search, args=(["slow"], 1)) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        for process in processes:
+            stop_replica(process)
+
+    assert all(replica.requests > 0 for replica in client.replicas)
+    assert sum(replica.requests for replica in client.replicas) == 8
+
+def test_unsampled_replica_score_grows_with_load():
+    client = RetrievalClient(["127.0.0.1:1", "127.0.0.1:2"])
+    first, second = client.replicas
+    first.in_flight = 3
+
+    assert client._ordered_replicas()[0] is second
+    assert second.score(1.0) < first.score(1.0)
+
+def test_stale_latency_estimate_ages_out():
+    client = RetrievalClient(["127.0.0.1:1", "127.0.0.1:2"])
+    slow, fast = client.replicas
+    slow.ewma_ms, slow.sampled_at = 500.0, time.monotonic() - 60
+    fast.ewma_ms, fast.sampled_at = 5.0, time.monotonic()
+    fast.in_flight = 1
+
+    assert slow.latency_estimate() is None
+    assert client._ordered_replicas()[0] is slow
+
+def test_failure_resets_latency_estimate():
+    replica = Replica("127.0.0.1:1")
+    replica.ewma_ms, replica.sampled_at = 500.0, time.monotonic()
+    replica.in_flight = 1
+
+    replica.fail(None)
+
+    assert replica.latency_estimate() is None
+    assert replica.healthy() is False
+
+def test_get_client_is_keyed_on_addresses():
+    first = retrieval_client.get_client(["127.0.0.1:1"])
+
+    assert retrieval_client.get_client(["127.0.0.1:1"]) is first
+    other = retrieval_client.get_client(["127.0.0.1:2"])
+    assert other is not first
+    assert [replica.address for replica in other.replicas] == ["127.0.0.1:2"]
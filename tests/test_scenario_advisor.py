@@ -0,0 +1,162 @@
+import re
+import sys
+import types
+import importlib
+import pytest
+
+SCENARIO = (
+    "A state law bans online speech criticizing ministers to protect public order. "
+    "Is it valid under Article 19(2)?"
+)
+
+class Doc:
+    """Minimal stand-in for a LangChain Document."""
+
+    def __init__(self, page_content, metadata):
+        self.page_content = page_content
+        self.metadata = metadata
+
+CORPUS = [
+    Doc("Article 19(1)(a) gives every citizen the freedom of speech and expression.",
+        {"source": "constitution.pdf", "page": 9}),
+    Doc("Clause (2) lets the State make laws imposing reasonable restrictions in the interests of public order.",
+        {"source": "constitution.pdf", "page": 10}),
+    Doc("In Shreya Singhal v. Union of India the Supreme Court struck down Section 66A of the IT Act.",
+        {"source": "judgments.pdf", "page": 3}),
+    Doc("The Seventh Schedule divides legislative subjects between the Union and the States.",
+        {"source": "constitution.pdf", "page": 250}),
+]
+
+def _stub_module(name, **attrs):
+    module = types.ModuleType(name)
+    module.__dict__.update(attrs)
+    return module
+
+def _import_or_stub(patch, name, **attrs):
+    """Import a dependency, or register a minimal stub when it isn't installed."""
+    try:
+        importlib.import_module(name)
+    except ImportError:
+        patch.setitem(sys.modules, name, _stub_module(name, **attrs))
+
+@pytest.fixture(scope="module")
+def advisor():
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setenv("GOOGLE_API_KEY", "test-key")
+        _import_or_stub(patch, "dotenv", load_dotenv=lambda *args, **kwargs: None)
+        _import_or_stub(patch, "langchain_google_genai",
+                        GoogleGenerativeAI=lambda **kwargs: None,
+                        GoogleGenerativeAIEmbeddings=lambda **kwargs: None)
+        # search_many is replaced in every test, so the index stack is optional
+        _import_or_stub(patch, "retrieval", search_many=None)
+        patch.delitem(sys.modules, "scenario_advisor", raising=False)
+        yield importlib.import_module("scenario_advisor")
+        patch.delitem(sys.modules, "scenario_advisor", raising=False)
+
+def _words(text):
+    return set(re.findall(r"[a-z0-9]+", text.lower()))
+
+def lexical_search_many(queries, k=5):
+    """Word-overlap stand-in for the embedding search."""
+    results = []
+    for query in queries:
+        scored = [(doc, float(len(_words(query) & _words(doc.page_content)))) for doc in CORPUS]
+        scored.sort(key=lambda hit: hit[1], reverse=True)
+        results.append(scored[:k])
+    return results
+
+class FakeLLM:
+    def __init__(self, answer="Analysis.", error=None):
+        self.answer = answer
+        self.error = error
+        self.prompts = []
+
+    def invoke(self, prompt):
+        self.prompts.append(prompt)
+        if self.error:
+            raise self.error
+        return self.answer
+
+def test_extract_key_terms_keeps_legal_references_and_numbers(advisor):
+    terms = advisor.extract_key_terms("Does a ban on cow slaughter violate Article 19(1)(g) and Article 25?")
+    assert terms == ["ban", "cow", "slaughter", "violate", "article 19(1)(g)", "article 25"]
+
+    terms = advisor.extract_key_terms(
+        "A man was detained under Section 144 CrPC without producing him before a magistrate within 24 hours"
+    )
+    assert terms == ["man", "detained", "section 144", "crpc", "producing", "magistrate", "24", "hours"]
+
+def test_extract_key_terms_keeps_scenario_order_up_to_limit(advisor):
+    assert advisor.extract_key_terms("public order and public health", limit=2) == ["public", "order"]
+
+def test_decompose_scenario_builds_short_distinct_facets(advisor):
+    queries = advisor.decompose_scenario(SCENARIO)
+
+    assert queries[0] == SCENARIO
+    facets = queries[1:]
+    assert len(facets) == len(advisor.SUB_QUERY_TEMPLATES)
+    assert len(set(queries)) == len(queries)
+    for facet in facets:
+        assert SCENARIO not in facet
+        assert "public order" in facet
+        assert "article 19(2)" in facet
+
+def test_facet_queries_do_not_all_return_the_same_hit(advisor, monkeypatch):
+    monkeypatch.setattr(advisor, "search_many", lexical_search_many)
+    queries = advisor.decompose_scenario(SCENARIO)
+
+    top_hits = [hits[0][0] for hits in lexical_search_many(queries, k=1)]
+    assert len({id(doc) for doc in top_hits}) > 1
+
+    evidence = advisor.gather_evidence(queries)
+    assert all(doc in evidence for doc in top_hits)
+
+def test_gather_evidence_dedupes_and_respects_budget(advisor, monkeypatch):
+    doc = CORPUS[0]
+    monkeypatch.setattr(advisor, "search_many", lambda queries, k=5: [[(doc, 0.1)] for _ in queries])
+    assert advisor.gather_evidence(["a", "b", "c"]) == [doc]
+
+    monkeypatch.setattr(advisor, "search_many", lexical_search_many)
+    assert advisor.gather_evidence(["speech"], token_budget=5) == []
+
+def test_response_cites_numbered_sources(advisor, monkeypatch):
+    llm = FakeLLM("Article 19(2) permits it [1].")
+    monkeypatch.setattr(advisor, "llm", llm)
+    monkeypatch.setattr(advisor, "search_many",
+                        lambda queries, k=5: [[(CORPUS[1], 0.1), (CORPUS[2], 0.2)] for _ in queries])
+
+    answer = advisor.get_scenario_based_response(SCENARIO)
+
+    prompt = llm.prompts[0]
+    assert SCENARIO in prompt
+    assert f"[1] constitution.pdf (Page 10)\n{CORPUS[1].page_content}" in prompt
+    assert f"[2] judgments.pdf (Page 3)\n{CORPUS[2].page_content}" in prompt
+    assert answer == (
+        "Article 19(2) permits it [1].\n\n**Sources:**"
+        "\n- [1] constitution.pdf (Page 10)"
+        "\n- [2] judgments.pdf (Page 3)"
+    )
+
+def test_response_without_evidence_has_no_sources(advisor, monkeypatch):
+    llm = FakeLLM("The context is insufficient.")
+    monkeypatch.setattr(advisor, "llm", llm)
+    monkeypatch.setattr(advisor, "search_many", lambda queries, k=5: [[] for _ in queries])
+
+    answer = advisor.get_scenario_based_response(SCENARIO)
+
+    assert "No relevant context was found." in llm.prompts[0]
+    assert answer == "The context is insufficient."
+
+def test_response_reports_retrieval_and_generation_errors(advisor, monkeypatch):
+    def failing_search(queries, k=5):
+        raise ConnectionError("no replica")
+
+    llm = FakeLLM()
+    monkeypatch.setattr(advisor, "llm", llm)
+    monkeypatch.setattr(advisor, "search_many", failing_search)
+    assert advisor.get_scenario_based_response(SCENARIO) == "Error retrieving relevant context: no replica"
+    assert llm.prompts == []
+
+    monkeypatch.setattr(advisor, "llm", FakeLLM(error=RuntimeError("quota")))
+    monkeypatch.setattr(advisor, "search_many", lexical_search_many)
+    assert advisor.get_scenario_based_response(SCENARIO) == "Error generating response: quota"